@@ -1,15 +1,28 @@
 from fasthtml.common import *
-from fasthtml.components import Script
 
 # MonsterUI shadows fasthtml components with the same name
 from monsterui.all import *
 
 import os
+import re
+from html import escape
+import uuid
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 import dotenv
+import httpx
 import json
+import orjson
 from pathlib import Path
+from string import Template
+from urllib.parse import urlparse
+from starlette.middleware.gzip import GZipMiddleware
 from starlette.requests import Request
 
 from src.llm.judge import JUDGE_SYSTEM_PROMPT
@@ -18,31 +31,95 @@ from src.pipeline import CryptoEventPipeline
 # Load environment variables from .env file if it exists
 dotenv.load_dotenv()
 
-# Configure logging
+# Configure logging, the level can be raised in production (e.g. LOG_LEVEL=WARNING).
+# force=True overrides the basicConfig calls made when the src modules are imported
 logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    force=True,
 )
 logger = logging.getLogger(__name__)
 
-# Get frankenui and tailwind headers via CDN using Theme.blue.headers()
-hdrs = Theme.blue.headers()
+# Get frankenui and tailwind headers via CDN using Theme.blue.headers(), plus the
+# htmx SSE extension used to stream search results. They never change, so they are
+# rendered to HTML once here instead of on every full page response
+hdrs = (
+    NotStr(
+        to_xml(
+            (
+                *Theme.blue.headers(),
+                Script(src="https://cdn.jsdelivr.net/npm/htmx-ext-sse@2.2.2/sse.js"),
+            )
+        )
+    ),
+)
+
+
+async def open_http_client():
+    """Create the HTTP/2 connection pool shared by all OpenAI clients"""
+    app.state.http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+
+async def preload_pipeline():
+    """Create the default pipeline at startup, so the first search doesn't pay for it.
+
+    Without API keys in the environment, users supply their own with each search.
+    """
+    if os.environ.get("EXA_API_KEY") and os.environ.get("OPENAI_API_KEY"):
+        await get_pipeline()
+
+
+async def close_http_client():
+    """Close the shared HTTP connection pool"""
+    await app.state.http_client.aclose()
+
+
+# Development mode (DEV=1) reloads the server on code changes and live-reloads the
+# browser. Production skips the file watcher and the injected live-reload script.
+DEV = bool(os.environ.get("DEV"))
 
 # fast_app is shadowed by MonsterUI to make it default to no Pico, and add body classes
 # needed for frankenui theme styling
-app, rt = fast_app(hdrs=hdrs, live=False)
+app, rt = fast_app(
+    hdrs=hdrs,
+    live=DEV,
+    on_startup=[open_http_client, preload_pipeline],
+    on_shutdown=[close_http_client],
+    # The form with the judge prompt and the result cards are repetitive HTML that
+    # compresses several times over. Starlette never compresses event streams.
+    middleware=[Middleware(GZipMiddleware, minimum_size=512, compresslevel=6)],
+)
 
 # Default values for the search form
 current_query = "Bitcoin cryptocurrency news and developments"
-current_date = datetime.now().strftime("%Y-%m-%d")
 current_model = "gpt-4o-mini"
 current_judge_prompt = JUDGE_SYSTEM_PROMPT
 
-# Global variables to store the last search results
-last_search_result = None
-last_events = None
 
-# Global variable to store the pipeline instance
-pipeline = None
+def today():
+    """Today's date in YYYY-MM-DD format, the default date of the search form.
+
+    Resolved per request, so a long-running server doesn't keep the start-up date.
+    """
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+# Number of search results per judge call; chunks are evaluated concurrently
+JUDGE_CHUNK_SIZE = 5
+
+# Pipelines keyed by the (exa_api_key, openai_api_key, openai_base_url) overrides,
+# so per-request API keys never clobber a pipeline used by another request. Kept in
+# LRU order and bounded, since every user-supplied key adds an entry
+app.state.pipelines = OrderedDict()
+MAX_PIPELINES = 8
+app.state.pipeline_lock = asyncio.Lock()
+
+# OpenAI-compatible endpoint for Gemini models
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 
 
 def Accordion(title, content):
@@ -56,6 +133,96 @@ def Accordion(title, content):
     )
 
 
+@lru_cache(maxsize=4096)
+def format_display_url(url):
+    """Short URL shown on a card: the domain for web URLs, the URL itself otherwise"""
+    display_url = url
+    if url.startswith("http"):
+        try:
+            parsed_url = urlparse(url)
+            display_url = "URL: " + parsed_url.netloc
+        except ValueError:
+            pass
+    return display_url
+
+
+def BaseCardTree(
+    title,
+    url,
+    display_url,
+    meta,
+    description,
+    highlights=None,
+    summary=None,
+    relevance_reasoning=None,
+    show_description_in_card=True,
+):
+    """Component tree of a card, used to build the card HTML templates"""
+    # FastHTML skips None children, so optional elements are inlined as
+    # conditional expressions and the card is built in a single pass
+    muted = TextPresets.muted_sm
+    card_elements = [
+        # Title
+        H4(title, cls="mt-2"),
+        # Key information at the top
+        Div(
+            A(display_url, href=url, target="_blank", cls=ButtonT.link),
+            P(meta, cls=muted),
+            cls="mb-2",
+        ),
+        # Description, if it should be shown in the card
+        P(description, cls=muted) if show_description_in_card else None,
+        # Optional highlights and summary, only if there is something to show
+        (
+            Div(
+                P(f"Highlights: {highlights}", cls=muted) if highlights else None,
+                P(f"Summary: {summary}", cls=muted) if summary else None,
+            )
+            if highlights or summary
+            else None
+        ),
+        # Accordion with the relevance reasoning and the full content
+        Accordion(
+            "Show Full Content",
+            Div(
+                (
+                    P(f"Relevance Reasoning: {relevance_reasoning}", cls=muted)
+                    if relevance_reasoning
+                    else None
+                ),
+                P(f"Full Content: {description}", cls=muted),
+            ),
+        ),
+    ]
+
+    return Card(*card_elements)
+
+
+@lru_cache(maxsize=None)
+def card_template(show_description_in_card, has_highlights, has_summary, has_reasoning):
+    """HTML template of a card with the given optional parts.
+
+    The template is rendered once from BaseCardTree with {placeholders} in place of
+    the values, so every card after that is a single str.format call.
+    """
+    return to_xml(
+        BaseCardTree(
+            title="{title}",
+            url="{url}",
+            display_url="{display_url}",
+            meta="{meta}",
+            description="{description}",
+            highlights="{highlights}" if has_highlights else None,
+            summary="{summary}" if has_summary else None,
+            relevance_reasoning="{relevance_reasoning}" if has_reasoning else None,
+            show_description_in_card=show_description_in_card,
+        )
+    )
+
+
+# Cards are immutable HTML strings, so repeat searches and cached results reuse them.
+# The key is every card value, so the same URL with other highlights is a new card
+@lru_cache(maxsize=512)
 def BaseCard(
     title,
     url,
@@ -69,106 +236,83 @@ def BaseCard(
     show_description_in_card=True,
 ):
     """Base card component for displaying search results or events"""
-    # Get domain for display
-    display_url = url
-    if url.startswith("http"):
-        try:
-            from urllib.parse import urlparse
-
-            parsed_url = urlparse(url)
-            display_url = "URL: " + parsed_url.netloc
-        except:
-            pass
-
-    # Content for accordion
-    accordion_elements = []
-
-    # Add relevance reasoning to accordion if available
-    if relevance_reasoning:
-        accordion_elements.append(
-            P(f"Relevance Reasoning: {relevance_reasoning}", cls=TextPresets.muted_sm)
+    template = card_template(
+        show_description_in_card,
+        bool(highlights),
+        bool(summary),
+        bool(relevance_reasoning),
+    )
+    # Values are escaped the same way FastHTML escapes text, attributes are quoted
+    return Safe(
+        template.format(
+            title=escape(str(title), quote=False),
+            url=escape(url),
+            display_url=escape(format_display_url(url), quote=False),
+            meta=escape(f"{date} | {score_label}: {score_or_relevance}", quote=False),
+            description=escape(str(description), quote=False),
+            highlights=escape(str(highlights), quote=False),
+            summary=escape(str(summary), quote=False),
+            relevance_reasoning=escape(str(relevance_reasoning), quote=False),
         )
-
-    # Add full description to accordion if it's not shown in the card
-    # or if it's a search result (where we want to show it in both places)
-    accordion_elements.append(
-        P(f"Full Content: {description}", cls=TextPresets.muted_sm)
     )
 
-    # Create optional content elements for highlights and summary
-    optional_elements = []
-    if highlights:
-        optional_elements.append(
-            P(f"Highlights: {highlights}", cls=TextPresets.muted_sm)
-        )
-    if summary:
-        optional_elements.append(P(f"Summary: {summary}", cls=TextPresets.muted_sm))
 
-    # Create optional content div only if there are elements to show
-    optional_content = Div(*optional_elements) if optional_elements else None
+# Published dates are usually ISO 8601 strings, which can be sliced without parsing
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
 
-    card_elements = [
-        # Title
-        H4(title, cls="mt-2"),
-        # Key information at the top
-        Div(
-            A(display_url, href=url, target="_blank", cls=ButtonT.link),
-            P(
-                f"{date} | {score_label}: {score_or_relevance}",
-                cls=TextPresets.muted_sm,
-            ),
-            cls="mb-2",
-        ),
-    ]
 
-    # Add description to card if show_description_in_card is True
-    if show_description_in_card:
-        card_elements.append(P(description, cls=TextPresets.muted_sm))
+@lru_cache(maxsize=512)
+def format_published_date(date_str):
+    """Format a published date string as YYYY-MM-DD, keeping it unchanged if it can't be parsed"""
+    if _ISO_DATE_RE.match(date_str):
+        return date_str[:10]
+    try:
+        parsed_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return parsed_date.strftime("%Y-%m-%d")
+    except ValueError:
+        # Keep the original string if parsing fails
+        return date_str
+
 
-    # Add optional content if it exists
-    if optional_content:
-        card_elements.append(optional_content)
+# Maximum number of highlights shown on a search card
+MAX_HIGHLIGHTS = 10
 
-    # Add accordion with additional details
-    accordion_content = Div(*accordion_elements)
-    card_elements.append(Accordion("Show Full Content", accordion_content))
 
-    return Card(*card_elements)
+def format_highlights(highlights):
+    """Join a list of highlights into a single string, skipping blank entries"""
+    if not isinstance(highlights, list):
+        return highlights
+    # FastHTML escapes text children, so the joined string can be used as-is
+    return "; ".join(
+        islice((h for h in highlights if h and not h.isspace()), MAX_HIGHLIGHTS)
+    )
 
 
 def SearchCard(result):
     """Card component for displaying search results"""
     # All results from the pipeline's SearchResult.results are dictionaries
-    title = result.get("title", "No Title")
-    url = result.get("url", "#")
+    get = result.get
+    title = get("title", "No Title")
+    url = get("url", "#")
 
     # Parse and format the date
-    date = result.get("published_date", "No Date")
+    date = get("published_date", "No Date")
     if isinstance(date, datetime):
         date = date.strftime("%Y-%m-%d")
     elif isinstance(date, str) and date:
-        try:
-
-            parsed_date = datetime.fromisoformat(date.replace("Z", "+00:00"))
-            date = parsed_date.strftime("%Y-%m-%d")
-        except (ValueError, TypeError):
-            # Keep the original string if parsing fails
-            pass
+        date = format_published_date(date)
 
     # Format score to 3 decimal places
-    score = result.get("score", "N/A")
+    score = get("score", "N/A")
     if isinstance(score, (float, int)):
         score = f"{score:.3f}"
 
     # Get full content for the accordion
-    description = result.get("content", "No description available")
+    description = get("content", "No description available")
 
-    # Join highlights if it's a list
-    highlights = result.get("highlights", "")
-    if isinstance(highlights, list):
-        highlights = "; ".join(highlights)
+    highlights = format_highlights(get("highlights", ""))
 
-    summary = result.get("summary", "")
+    summary = get("summary", "")
 
     card = BaseCard(
         title=title,
@@ -217,15 +361,9 @@ def EventCard(event):
     return card
 
 
-def search_form():
-    """Create a responsive search form with query, date, and model selection"""
-    models = ["gpt-4o-mini", "gpt-4o"]  # , "gemini-2.0-flash"
-
-    # Get the current judge prompt
-    current_judge_prompt_value = current_judge_prompt
-
-    # Advanced settings content
-    advanced_settings = DivVStacked(
+def advanced_settings(judge_prompt=current_judge_prompt):
+    """API key inputs and the judge prompt editor of the search form"""
+    return DivVStacked(
         # API Keys section
         DivVStacked(
             H4("API Keys", cls="text-lg font-bold"),
@@ -256,6 +394,8 @@ def search_form():
         # Judge Prompt section - use a container to ensure full width
         Container(
             H4("Judge Prompt", cls="text-lg font-bold mt-4"),
+            # Disabled fields aren't submitted, so the default prompt only travels
+            # with the search request once the user chooses to edit it
             LabelTextArea(
                 "Custom Judge Prompt",
                 id="judge-prompt",
@@ -263,12 +403,29 @@ def search_form():
                 rows=20,  # Increased rows for more height
                 placeholder="Enter your judge prompt here...",
                 cls="w-full",  # Full width
-                value=current_judge_prompt_value,
+                value=judge_prompt,
+                disabled=True,
+            ),
+            Button(
+                "Edit",
+                type="button",
+                cls=ButtonT.secondary,
+                onclick="document.getElementById('judge-prompt').disabled = false; this.remove();",
             ),
             cls="w-full",
         ),
     )
 
+
+def search_form(
+    query=current_query,
+    date=None,
+    model=current_model,
+):
+    """Create a responsive search form with query, date, and model selection"""
+    date = date or today()
+    models = ["gpt-4o-mini", "gpt-4o"]  # , "gemini-2.0-flash"
+
     # Container for the entire form - use Container for full width
     return Container(
         DivCentered(
@@ -287,7 +444,7 @@ def search_form():
                 id="query",
                 name="query",
                 placeholder="Enter search terms...",
-                value=current_query,
+                value=query,
                 input_cls="w-full",  # Make input full width
             ),
             # Date and Model inputs side by side
@@ -298,12 +455,12 @@ def search_form():
                     name="date",
                     type="date",
                     placeholder="YYYY-MM-DD",
-                    value=current_date,
+                    value=date,
                 ),
                 LabelSelect(
                     *[
-                        Option(model, value=model, selected=(model == current_model))
-                        for model in models
+                        Option(name, value=name, selected=(name == model))
+                        for name in models
                     ],
                     label="Model",
                     id="model",
@@ -312,8 +469,17 @@ def search_form():
                 cols=1,
                 cols_md=2,  # Two columns on medium screens and above
             ),
-            # Advanced Settings in accordion
-            Accordion("Advanced Settings", advanced_settings),
+            # Advanced Settings in accordion. Most searches never open it, so the
+            # judge prompt is only fetched the first time the accordion is opened
+            Accordion(
+                "Advanced Settings",
+                Div(
+                    P("Loading...", cls=TextPresets.muted_sm),
+                    hx_get="/advanced_settings",
+                    hx_trigger="toggle once from:closest details",
+                    hx_swap="outerHTML",
+                ),
+            ),
             # Search button centered
             DivCentered(
                 DivHStacked(
@@ -327,8 +493,8 @@ def search_form():
                         type="button",
                     ),
                 ),
-                # Loading indicator
-                Div(id="search-indicator", style="display:none")(
+                # Loading indicator, shown by htmx while the search request is in flight
+                Div(id="search-indicator", cls="htmx-indicator")(
                     Span("Searching...", cls=TextPresets.muted_sm),
                     Span("⟳", cls="animate-spin ml-2"),
                 ),
@@ -352,18 +518,31 @@ def search_form():
             )(
                 # Hidden fields to capture current search parameters
                 Input(
-                    type="hidden", id="query-hidden", name="query", value=current_query
+                    type="hidden", id="query-hidden", name="query", value=query
                 ),
-                Input(type="hidden", id="date-hidden", name="date", value=current_date),
+                Input(type="hidden", id="date-hidden", name="date", value=date),
                 Input(
-                    type="hidden", id="model-hidden", name="model", value=current_model
+                    type="hidden", id="model-hidden", name="model", value=model
                 ),
-                # Hidden field for judge prompt
+                # Hidden field for judge prompt, left empty for the default prompt
                 Input(
                     type="hidden",
                     id="judge-prompt-hidden",
                     name="judge_prompt",
-                    value=current_judge_prompt,
+                    value="",
+                ),
+                # Result counts of the search the feedback is about
+                Input(
+                    type="hidden",
+                    id="search-results-count-hidden",
+                    name="search_results_count",
+                    value=0,
+                ),
+                Input(
+                    type="hidden",
+                    id="events-count-hidden",
+                    name="events_count",
+                    value=0,
                 ),
                 # Feedback textarea
                 Textarea(
@@ -392,12 +571,11 @@ def search_form():
     )
 
 
-def initialize_pipeline():
+def initialize_pipeline(exa_api_key=None, openai_api_key=None, openai_base_url=None):
     """Initialize the CryptoEventPipeline."""
-    # Get API keys from environment variables
-    exa_api_key = os.environ.get("EXA_API_KEY")
-    openai_api_key = os.environ.get("OPENAI_API_KEY")
-    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    # Fall back to API keys from environment variables
+    exa_api_key = exa_api_key or os.environ.get("EXA_API_KEY")
+    openai_api_key = openai_api_key or os.environ.get("OPENAI_API_KEY")
 
     # Check if API keys are available
     if not exa_api_key or not openai_api_key:
@@ -410,48 +588,68 @@ def initialize_pipeline():
     return CryptoEventPipeline(
         exa_api_key=exa_api_key,
         openai_api_key=openai_api_key,
+        openai_base_url=openai_base_url,
+        http_client=app.state.http_client,
         load_db=False,
     )
 
 
+async def get_pipeline(exa_api_key=None, openai_api_key=None, openai_base_url=None):
+    """Get the shared pipeline for the given API key overrides, creating it if needed."""
+    key = (exa_api_key, openai_api_key, openai_base_url)
+    pipelines = app.state.pipelines
+    async with app.state.pipeline_lock:
+        pipeline = pipelines.get(key)
+        if pipeline is None:
+            pipeline = initialize_pipeline(*key)
+            pipelines[key] = pipeline
+            while len(pipelines) > MAX_PIPELINES:
+                pipelines.popitem(last=False)
+        else:
+            pipelines.move_to_end(key)
+    return pipeline
+
+
+# Search dates submitted by the form, in YYYY-MM-DD format
+_SEARCH_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+
+
+@lru_cache(maxsize=1024)
+def parse_search_date(date_str):
+    """Parse a YYYY-MM-DD search date, returning None if it is invalid"""
+    # Validate the format up front, so only out-of-range dates raise
+    match = _SEARCH_DATE_RE.match(date_str)
+    if not match:
+        return None
+    try:
+        return datetime(int(match[1]), int(match[2]), int(match[3]))
+    except ValueError:
+        return None
+
+
 async def run_search(
     query,
     date_str,
     exa_api_key=None,
 ):
     """Run just the search part of the pipeline and return search results."""
-    global pipeline, current_query, current_date
-
     # Parse date
     if date_str:
-        try:
-            # Parse YYYY-MM-DD format
-            year, month, day = date_str.split("-")
-            date = datetime(int(year), int(month), int(day))
-        except (ValueError, IndexError):
+        date = parse_search_date(date_str)
+        if date is None:
             return {"error": "Invalid date format. Use YYYY-MM-DD."}
     else:
         date = datetime.now()
 
-    # Update global state
-    current_query = query
-    current_date = date_str
-
-    # Initialize pipeline if not already done
-    if pipeline is None:
-        try:
-            pipeline = initialize_pipeline()
-        except ValueError as e:
-            logger.error(f"Pipeline initialization error: {str(e)}")
-            return {"error": str(e)}
-
-    # Override API key if provided
-    if exa_api_key:
-        pipeline.search_client.api_key = exa_api_key
+    try:
+        pipeline = await get_pipeline(exa_api_key=exa_api_key)
+    except ValueError as e:
+        logger.error("Pipeline initialization error: %s", e)
+        return {"error": str(e)}
 
     try:
         # Run just the search part of the pipeline
-        logger.info(f"Running search for query: {query}, date: {date_str}")
+        logger.info("Running search for query: %s, date: %s", query, date_str)
         search_result, formatted_query = await pipeline._perform_search(
             date=date,
             base_query=query,
@@ -465,7 +663,7 @@ async def run_search(
             "date": date,
         }
     except Exception as e:
-        logger.error(f"Error running search: {str(e)}")
+        logger.error("Error running search: %s", e)
         return {"error": str(e)}
 
 
@@ -477,54 +675,91 @@ async def run_ranking(
     model="gpt-4o-mini",
     judge_prompt=None,
 ):
-    """Run just the ranking part of the pipeline and return ranked events."""
-    global pipeline, current_model, current_judge_prompt
+    """Run just the ranking part of the pipeline and return ranked events.
 
-    # Update global state
-    current_model = model
-    if judge_prompt:
-        current_judge_prompt = judge_prompt
+    Judge failures are returned as an error, so they are shown and never cached.
+    """
+    # Nothing to judge, so skip the pipeline and the LLM call entirely
+    if not search_result.results:
+        return {"events": []}
 
-    # Initialize pipeline if not already done
-    if pipeline is None:
-        try:
-            pipeline = initialize_pipeline()
-        except ValueError as e:
-            logger.error(f"Pipeline initialization error: {str(e)}")
-            return {"error": str(e)}
-
-    # Override API key if provided
-    if openai_api_key:
-        pipeline.openai_client.api_key = openai_api_key
-
-    if model == "gemini-2.0-flash":
-        logger.info(f"Using Gemini API key -- {openai_api_key}")
-        pipeline.openai_client.base_url = (
-            "https://generativelanguage.googleapis.com/v1beta/openai/"
+    openai_base_url = GEMINI_BASE_URL if model == "gemini-2.0-flash" else None
+
+    try:
+        pipeline = await get_pipeline(
+            openai_api_key=openai_api_key, openai_base_url=openai_base_url
         )
-    else:
-        logger.info(f"Using OpenAI API key -- {openai_api_key}")
-        pipeline.openai_client.base_url = "https://api.openai.com/v1"
+    except ValueError as e:
+        logger.error("Pipeline initialization error: %s", e)
+        return {"error": str(e)}
 
     try:
         # Run the ranking part of the pipeline
-        logger.info(f"Running ranking with model: {model}")
+        logger.info("Running ranking with model: %s", model)
         events = await pipeline._rank_search_results(
             search_result=search_result,
             formatted_query=formatted_query,
             date=date,
-            judge_system_prompt=judge_prompt or current_judge_prompt,
+            judge_system_prompt=judge_prompt or JUDGE_SYSTEM_PROMPT,
             judge_model=model,
+            judge_chunk_size=JUDGE_CHUNK_SIZE,
+            raise_errors=True,
         )
 
         return {
             "events": events,
         }
     except Exception as e:
-        logger.error(f"Error running ranking: {str(e)}")
+        logger.error("Error running ranking: %s", e)
         return {"error": str(e)}
 
 
+class TTLCache:
+    """Small in-memory LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=128, ttl=900):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Return the cached value, or None if it is missing or expired"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries when full"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+# Pipeline results for recently submitted searches, so re-submitting the same form
+# while tuning the judge prompt doesn't hit Exa and the LLM again
+app.state.results_cache = TTLCache(maxsize=128, ttl=15 * 60)
+
+
+def results_cache_key(query, date_str, model, judge_prompt, openai_api_key, exa_api_key):
+    """Cache key for pipeline results, or None if the results must not be cached.
+
+    Requests with user-supplied API keys bypass the cache.
+    """
+    if openai_api_key or exa_api_key:
+        return None
+    judge_hash = hashlib.blake2b(
+        (judge_prompt or JUDGE_SYSTEM_PROMPT).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return (query, date_str, model, judge_hash)
+
+
 async def run_pipeline(
     query,
     date_str,
@@ -533,7 +768,19 @@ async def run_pipeline(
     model="gpt-4o-mini",
     judge_prompt=None,
 ):
-    """Run the full pipeline (search and judge) and return results."""
+    """Run the full pipeline (search and judge) and return results.
+
+    Results are cached for 15 minutes per (query, date, model, judge prompt). If the
+    ranking fails, the error is returned together with the search result.
+    """
+    cache_key = results_cache_key(
+        query, date_str, model, judge_prompt, openai_api_key, exa_api_key
+    )
+    if cache_key is not None:
+        cached = app.state.results_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     # Run search
     search_result = await run_search(query, date_str, exa_api_key)
     if "error" in search_result:
@@ -549,26 +796,31 @@ async def run_pipeline(
         judge_prompt,
     )
     if "error" in ranking_result:
-        return ranking_result
+        return {
+            "error": ranking_result["error"],
+            "search_result": search_result["search_result"],
+        }
 
     # Combine results
-    return {
+    result = {
         "search_result": search_result["search_result"],
         "events": ranking_result["events"],
     }
+    if cache_key is not None:
+        app.state.results_cache.set(cache_key, result)
+    return result
 
 
-@rt("/search_results", methods=["POST"])
-async def search_results(request: Request):
-    """Handle search form submission and return results from the crypto event pipeline"""
-    global last_search_result, last_events
-
-    # Get form data
-    form_data = await request.form()
+def parse_search_form(form_data):
+    """Extract the search parameters from the submitted search form"""
     query = form_data.get("query", current_query)
-    date = form_data.get("date", current_date)
+    date = form_data.get("date", today())
     model = form_data.get("model", current_model)
-    judge_prompt = form_data.get("judge_prompt", JUDGE_SYSTEM_PROMPT)
+    # The judge prompt is only submitted once edited; the default prompt is kept as
+    # an empty string and resolved server-side
+    judge_prompt = form_data.get("judge_prompt", "")
+    if judge_prompt.replace("\r\n", "\n") == JUDGE_SYSTEM_PROMPT:
+        judge_prompt = ""
 
     # Get API keys if provided
     openai_api_key = form_data.get("openai_api_key", "").strip()
@@ -579,156 +831,431 @@ async def search_results(request: Request):
     openai_key = openai_api_key if openai_api_key else None
     exa_key = exa_api_key if exa_api_key else None
     google_key = google_api_key if google_api_key else None
-    judge_prompt_val = judge_prompt if judge_prompt.strip() else None
-
-    # First, run the search part
-    search_result = await run_search(query, date, exa_key)
-    if "error" in search_result:
-        return Alert(search_result["error"], cls=AlertT.error)
 
-    # Display search results with loading indicator for ranking
-    search_results_div = Div(
-        H3("Search Results", cls="text-xl font-bold mb-4"),
-        Div(id="search-results", cls="space-y-4")(
-            *[SearchCard(result) for result in search_result["search_result"].results]
+    return {
+        "query": query,
+        "date": date,
+        "model": model,
+        "judge_prompt": judge_prompt,
+        "judge_prompt_val": judge_prompt if judge_prompt.strip() else None,
+        "exa_key": exa_key,
+        "api_key": (
+            openai_key if model == "gpt-4o-mini" or model == "gpt-4o" else google_key
         ),
-    )
+    }
 
-    # Now run the ranking part
-    api_key = openai_key if model == "gpt-4o-mini" or model == "gpt-4o" else google_key
-    ranking_result = await run_ranking(
-        search_result["search_result"],
-        search_result["formatted_query"],
-        search_result["date"],
-        api_key,
-        model,
-        judge_prompt_val,
-    )
-    if "error" in ranking_result:
-        return Div(
-            search_results_div,
-            Alert(ranking_result["error"], cls=AlertT.error),
-        )
 
-    # Extract events
-    events = ranking_result["events"]
+# Updates the hidden fields of the feedback form with the submitted search. It runs
+# as soon as htmx swaps the results in, the values are filled in as JSON literals
+FEEDBACK_FIELDS_JS = Template(
+    """<script>
+    document.getElementById('query-hidden').value = $query;
+    document.getElementById('date-hidden').value = $date;
+    document.getElementById('model-hidden').value = $model;
+    document.getElementById('judge-prompt-hidden').value = $judge_prompt;
+    document.getElementById('search-results-count-hidden').value = $search_results_count;
+    document.getElementById('events-count-hidden').value = $events_count;
+</script>"""
+)
+
 
-    # Store the results for later use
-    last_search_result = search_result["search_result"]
-    last_events = events
+def js_literal(value):
+    """Encode a value as a JavaScript literal that is safe inside a <script> tag"""
+    return json.dumps(value).replace("<", "\\u003c")
 
-    # Get reasoning from the first event if available
-    reasoning_summary = ""
+
+def FeedbackFieldsScript(
+    query, date, model, judge_prompt, search_results_count=0, events_count=0
+):
+    """JavaScript to update hidden fields in the feedback form"""
+    return Safe(
+        FEEDBACK_FIELDS_JS.substitute(
+            query=js_literal(query),
+            date=js_literal(date),
+            model=js_literal(model),
+            judge_prompt=js_literal(judge_prompt),
+            search_results_count=int(search_results_count),
+            events_count=int(events_count),
+        )
+    )
+
+
+def ReasoningSummary(events):
+    """Reasoning of the first ranked event, if available"""
     if events and events[0].relevance_reasoning:
-        reasoning_summary = Div(
+        return Div(
             H3("Ranking Reasoning", cls="text-xl font-bold mb-4"),
             P(events[0].relevance_reasoning, cls=TextPresets.muted_sm),
             cls="mb-4 p-4 bg-gray-50 rounded-lg",
         )
+    return ""
 
+
+def ResultsGridTree(search_cards, event_cards, search_attrs=None, event_attrs=None):
+    """Component tree of the results grid, used to build the grid HTML templates"""
+    return Grid(
+        # Left column: Search Results
+        Div(
+            H3("Search Results", cls="text-xl font-bold mb-4"),
+            Div(id="search-results", cls="space-y-4", **(search_attrs or {}))(
+                *search_cards
+            ),
+        ),
+        # Right column: Relevant Events
+        Div(
+            H3("Relevant Events", cls="text-xl font-bold mb-4"),
+            Div(id="event-results", cls="space-y-4", **(event_attrs or {}))(
+                *event_cards
+            ),
+        ),
+        cols_lg=2,
+        cls="gap-6",
+    )
+
+
+@lru_cache(maxsize=None)
+def results_grid_template(stream):
+    """HTML template of the results grid, with {placeholders} for the cards.
+
+    When streaming, the columns are filled in by the search and event card events.
+    """
+    if stream:
+        search_attrs = {"sse_swap": "search_card", "hx_swap": "beforeend"}
+        event_attrs = {"sse_swap": "event_card", "hx_swap": "beforeend"}
+    else:
+        search_attrs = event_attrs = None
+    return to_xml(
+        ResultsGridTree(
+            [Safe("{search_cards}")],
+            [Safe("{event_cards}")],
+            search_attrs=search_attrs,
+            event_attrs=event_attrs,
+        )
+    )
+
+
+def ResultsGrid(search_cards, event_cards, stream=False):
+    """Two-column grid with search results on the left and relevant events on the right"""
+    # Cards are HTML strings already, so the columns are joined in one go
+    return Safe(
+        results_grid_template(stream).format(
+            search_cards="".join(search_cards), event_cards="".join(event_cards)
+        )
+    )
+
+
+def ResultsStream(token, params):
+    """Results shell that is filled in by the /search_stream server-sent events"""
     return Div(
-        # JavaScript to update hidden fields in the feedback form
-        Script(
-            f"""
-            document.addEventListener('DOMContentLoaded', function() {{
-                document.getElementById('query-hidden').value = "{query}";
-                document.getElementById('date-hidden').value = "{date}";
-                document.getElementById('model-hidden').value = "{model}";
-                document.getElementById('judge-prompt-hidden').value = `{judge_prompt}`;
-            }});
-        """
+        hx_ext="sse",
+        sse_connect=f"/search_stream/{token}",
+        sse_close="close",
+    )(
+        FeedbackFieldsScript(
+            params["query"], params["date"], params["model"], params["judge_prompt"]
         ),
-        # Display reasoning summary if available
-        reasoning_summary,
-        # Search results grid
-        Grid(
-            # Left column: Search Results
-            search_results_div,
-            # Right column: Relevant Events
+        # Progress messages, replaced as the pipeline advances
+        Div(sse_swap="status")(
+            Span("Searching...", cls=TextPresets.muted_sm),
+            Span("⟳", cls="animate-spin ml-2"),
+        ),
+        Div(sse_swap="reasoning"),
+        # Cards are appended as soon as they are available
+        ResultsGrid([], [], stream=True),
+    )
+
+
+# Search parameters waiting for their /search_stream connection, keyed by a one-time
+# token so API keys and the judge prompt never end up in a URL
+app.state.pending_searches = {}
+MAX_PENDING_SEARCHES = 100
+
+
+async def stream_search_results(params):
+    """Run the pipeline and yield the results as server-sent events.
+
+    Search cards are sent as soon as the search completes, so they are visible
+    while the slower ranking step is still running.
+    """
+    if params is None:
+        yield sse_message(
+            Alert("Search expired, please search again.", cls=AlertT.error),
+            event="status",
+        )
+        yield sse_message(Div(), event="close")
+        return
+
+    cache_key = results_cache_key(
+        params["query"],
+        params["date"],
+        params["model"],
+        params["judge_prompt_val"],
+        params["api_key"],
+        params["exa_key"],
+    )
+    cached = app.state.results_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        for result in cached["search_result"].results:
+            yield sse_message(SearchCard(result), event="search_card")
+        search_result_obj = cached["search_result"]
+        events = cached["events"]
+    else:
+        # First, run the search part
+        search_result = await run_search(
+            params["query"], params["date"], params["exa_key"]
+        )
+        if "error" in search_result:
+            yield sse_message(
+                Alert(search_result["error"], cls=AlertT.error), event="status"
+            )
+            yield sse_message(Div(), event="close")
+            return
+
+        search_result_obj = search_result["search_result"]
+        for result in search_result_obj.results:
+            yield sse_message(SearchCard(result), event="search_card")
+        yield sse_message(
             Div(
-                H3("Relevant Events", cls="text-xl font-bold mb-4"),
-                Div(id="event-results", cls="space-y-4")(
-                    *[EventCard(event) for event in events]
-                ),
+                Span("Ranking events...", cls=TextPresets.muted_sm),
+                Span("⟳", cls="animate-spin ml-2"),
             ),
-            cols_lg=2,
-            cls="gap-6",
+            event="status",
+        )
+
+        # Now run the ranking part
+        ranking_result = await run_ranking(
+            search_result_obj,
+            search_result["formatted_query"],
+            search_result["date"],
+            params["api_key"],
+            params["model"],
+            params["judge_prompt_val"],
+        )
+        if "error" in ranking_result:
+            yield sse_message(
+                Alert(ranking_result["error"], cls=AlertT.error), event="status"
+            )
+            yield sse_message(Div(), event="close")
+            return
+
+        events = ranking_result["events"]
+        if cache_key is not None:
+            app.state.results_cache.set(
+                cache_key, {"search_result": search_result_obj, "events": events}
+            )
+
+    # Clear the progress message and record the result counts for feedback
+    yield sse_message(
+        Div(
+            FeedbackFieldsScript(
+                params["query"],
+                params["date"],
+                params["model"],
+                params["judge_prompt"],
+                len(search_result_obj.results),
+                len(events),
+            )
         ),
+        event="status",
     )
+    yield sse_message(ReasoningSummary(events), event="reasoning")
+    for event in events:
+        yield sse_message(EventCard(event), event="event_card")
+    yield sse_message(Div(), event="close")
+
+
+@rt("/search_stream/{token}")
+async def search_stream(token: str):
+    """Stream the results of a submitted search as server-sent events"""
+    params = app.state.pending_searches.pop(token, None)
+    response = EventStream(stream_search_results(params))
+    # Keep proxies from buffering or re-encoding the stream
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    return response
+
+
+@rt("/search_results", methods=["POST"])
+async def search_results(request: Request):
+    """Handle search form submission and return results from the crypto event pipeline"""
+    # Get form data
+    form_data = await request.form()
+    params = parse_search_form(form_data)
+
+    # htmx clients get a shell that streams the results as they become available
+    if request.headers.get("HX-Request"):
+        token = uuid.uuid4().hex
+        pending_searches = app.state.pending_searches
+        pending_searches[token] = params
+        while len(pending_searches) > MAX_PENDING_SEARCHES:
+            pending_searches.pop(next(iter(pending_searches)))
+        return ResultsStream(token, params)
+
+    # Run the search and ranking, served from the cache on repeat submissions
+    pipeline_result = await run_pipeline(
+        params["query"],
+        params["date"],
+        params["api_key"],
+        params["exa_key"],
+        params["model"],
+        params["judge_prompt_val"],
+    )
+    if "search_result" not in pipeline_result:
+        return Alert(pipeline_result["error"], cls=AlertT.error)
+
+    # The grid joins the cards directly, so they are rendered lazily in one pass
+    results = pipeline_result["search_result"].results
+    search_cards = map(SearchCard, results)
+    if "error" in pipeline_result:
+        return Div(
+            ResultsGrid(search_cards, ()),
+            Alert(pipeline_result["error"], cls=AlertT.error),
+        )
+
+    # Extract events
+    events = pipeline_result["events"]
+
+    return Div(
+        FeedbackFieldsScript(
+            params["query"],
+            params["date"],
+            params["model"],
+            params["judge_prompt"],
+            len(results),
+            len(events),
+        ),
+        # Display reasoning summary if available
+        ReasoningSummary(events),
+        # Search results grid
+        ResultsGrid(search_cards, map(EventCard, events)),
+    )
+
+
+@lru_cache(maxsize=64)
+def search_page_html(query, date, model):
+    """Main content of the search page rendered to HTML, cached since it only
+    depends on the default values of the search form"""
+    _, main = Titled("Bitcoin News Search", Div(search_form(query, date, model)))
+    return to_xml(main)
+
+
+@lru_cache(maxsize=64)
+def search_page_etag(query, date, model, htmx=False):
+    """ETag of the search page, covering the page headers and the cached body.
+
+    The full page and the htmx partial get different tags. The tag is weak, since
+    the gzip middleware serves the same page in more than one encoding.
+    """
+    shell = "htmx" if htmx else hdrs[0]
+    page = shell + search_page_html(query, date, model)
+    digest = hashlib.blake2b(page.encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(etag, if_none_match):
+    """Check an ETag against an If-None-Match header, using weak comparison"""
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
 
 
 @rt("/search")
-def search_page():
-    """Render the search page with the search form"""
-    return Titled(
-        "Bitcoin News Search",
-        Div(
-            search_form(),
-            # Add JavaScript to handle the loading indicator and modal closing
-            Script(
-                """
-                document.addEventListener('htmx:beforeRequest', function(event) {
-                    if (event.detail.elt.id === 'search-form') {
-                        document.getElementById('search-indicator').style.display = 'block';
-                    }
-                });
-                
-                document.addEventListener('htmx:afterRequest', function(event) {
-                    if (event.detail.elt.id === 'search-form') {
-                        document.getElementById('search-indicator').style.display = 'none';
-                    }
-                    
-                    // Close feedback modal after successful form submission
-                    if (event.detail.elt.id === 'feedback-form' && event.detail.successful) {
-                        if (typeof UIkit !== 'undefined' && UIkit.modal) {
-                            UIkit.modal('#feedback-modal').hide();
-                        }
-                    }
-                });
-            """
-            ),
+def search_page(request: Request):
+    """Render the search page with the search form.
+
+    The page only changes with the form defaults, so browsers revalidate it with
+    its ETag and get an empty 304 response when they already have it.
+    """
+    # The date is part of the key, so the cached page and its ETag change daily
+    date = today()
+    htmx = bool(request.headers.get("HX-Request"))
+    etag = search_page_etag(current_query, date, current_model, htmx)
+    # htmx requests get the page without the document shell, so vary on them
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=60",
+        "Vary": "HX-Request",
+    }
+    if etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    return FtResponse(
+        (
+            Title("Bitcoin News Search"),
+            Safe(search_page_html(current_query, date, current_model)),
         ),
+        headers=headers,
     )
 
 
+@lru_cache(maxsize=8)
+def advanced_settings_html(judge_prompt):
+    """Advanced settings rendered to HTML, cached since they only depend on the prompt"""
+    return to_xml(advanced_settings(judge_prompt))
+
+
+@rt("/advanced_settings")
+def advanced_settings_page():
+    """Contents of the advanced settings accordion, loaded when it is first opened"""
+    return Safe(advanced_settings_html(current_judge_prompt))
+
+
 @rt("/")
-def index():
+def index(request: Request):
     """Main page that redirects to the search page"""
-    return search_page()
+    return search_page(request)
+
+
+# Everything except letters, numbers and basic punctuation. \w matches the same
+# characters as str.isalnum plus the underscore, which is removed as well
+_PROMPT_STRIP_RE = re.compile(r"[^\w.,?!;:()\[\]{}\"' ]|_")
+
+
+def clean_prompt(prompt):
+    """Normalize a judge prompt for comparison, ignoring case and special characters"""
+    return _PROMPT_STRIP_RE.sub("", prompt).lower()
+
+
+DEFAULT_PROMPT_CLEAN = clean_prompt(JUDGE_SYSTEM_PROMPT)
+
+
+def append_feedback(feedback_file, feedback_data):
+    """Append a feedback record as one JSON line.
+
+    Each record is a single append, so the file never has to be read back or
+    rewritten and concurrent writers don't interleave partial records.
+    """
+    with open(feedback_file, "ab") as f:
+        f.write(orjson.dumps(feedback_data, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def load_feedback(feedback_file):
+    """Iterate over the feedback records of a JSON Lines file"""
+    with open(feedback_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
 
 
 @rt("/save_feedback", methods=["POST"])
 async def save_feedback(request: Request):
-    """Save user feedback to a JSON file"""
-    global last_search_result, last_events
-
+    """Save user feedback to a JSON Lines file"""
     try:
         # Get form data
         form_data = await request.form()
         feedback_text = form_data.get("feedback_text", "")
-        query = form_data.get("query", current_query)
-        date = form_data.get("date", current_date)
-        model = form_data.get("model", current_model)
+        query = form_data.get("query", "")
+        date = form_data.get("date", "")
+        model = form_data.get("model", "")
         judge_prompt = form_data.get("judge_prompt", "")
-        # Strip special characters, keep only letters, numbers and basic punctuation
-        judge_prompt_clean = "".join(
-            c for c in judge_prompt if c.isalnum() or c in ".,?!;:()[]{}\"' "
-        )
-        default_prompt_clean = "".join(
-            c for c in JUDGE_SYSTEM_PROMPT if c.isalnum() or c in ".,?!;:()[]{}\"' "
-        )
-        if judge_prompt_clean.lower() == default_prompt_clean.lower():
+        # The form sends "" for the default prompt, and an unedited copy is usually
+        # byte-equal, so the normalized comparison only runs for edited prompts
+        if judge_prompt and (
+            judge_prompt == JUDGE_SYSTEM_PROMPT
+            or clean_prompt(judge_prompt) == DEFAULT_PROMPT_CLEAN
+        ):
             judge_prompt = ""
 
-        # Count results and events (if available)
-        search_results_count = 0
-        events_count = 0
-
-        if last_search_result and hasattr(last_search_result, "results"):
-            search_results_count = len(last_search_result.results)
-
-        if last_events:
-            events_count = len(last_events)
+        # Result counts are sent along with the search they belong to
+        search_results_count = int(form_data.get("search_results_count") or 0)
+        events_count = int(form_data.get("events_count") or 0)
 
         # Create feedback data structure
         feedback_data = {
@@ -742,28 +1269,9 @@ async def save_feedback(request: Request):
             "feedback": feedback_text,
         }
 
-        # Ensure the feedback file exists
-        feedback_file = Path(f"feedback_{datetime.now().strftime('%Y-%m-%d')}.json")
-
-        # Load existing data or create new list
-        if feedback_file.exists():
-            try:
-                with open(feedback_file, "r") as f:
-                    existing_data = json.load(f)
-                    if not isinstance(existing_data, list):
-                        existing_data = []
-            except json.JSONDecodeError:
-                # If file exists but is not valid JSON, start fresh
-                existing_data = []
-        else:
-            existing_data = []
-
-        # Append new feedback
-        existing_data.append(feedback_data)
-
-        # Write back to file
-        with open(feedback_file, "w") as f:
-            json.dump(existing_data, f, indent=2)
+        # Append the feedback to the daily file in a thread, off the event loop
+        feedback_file = Path(f"feedback_{datetime.now().strftime('%Y-%m-%d')}.jsonl")
+        await asyncio.to_thread(append_feedback, feedback_file, feedback_data)
 
         # Return success message with JavaScript to close the modal
         return Div(
@@ -772,12 +1280,32 @@ async def save_feedback(request: Request):
         )
 
     except Exception as e:
-        logging.error(f"Error saving feedback: {str(e)}")
+        logger.error("Error saving feedback: %s", e)
         return Div(
             P(f"Error saving feedback: {str(e)}", cls="text-error font-bold"),
             cls="p-4 bg-error-light rounded",
         )
 
 
+# Run uvicorn on the uvloop event loop with the httptools parser when available
+# (they come with uvicorn[standard], but uvloop isn't available on Windows)
+try:
+    import uvloop  # noqa: F401
+    import httptools  # noqa: F401
+
+    server_kwargs = {"loop": "uvloop", "http": "httptools"}
+except ImportError:
+    server_kwargs = {}
+
+# Pending searches are handed to their /search_stream connection through app.state,
+# which lives in one process. Uvicorn workers share a single socket, so the stream
+# request could reach a worker that never saw the search: run a single worker and
+# scale out with separate instances behind a sticky load balancer instead
+# Uvicorn reads WEB_CONCURRENCY itself unless the worker count is given explicitly
+if os.environ.get("WEB_CONCURRENCY", "1").strip() != "1":
+    logger.warning(
+        "WEB_CONCURRENCY is ignored: streamed searches need a single worker process"
+    )
+
 # Use a different port
-serve()
+serve(reload=DEV, workers=1, **server_kwargs)
@@ -1,12 +1,14 @@
+import csv
 import httpx
 import json
 from datetime import datetime
 import os
-import pandas as pd
 
 # os.environ["TAVILY_API_KEY"] = "your-api-key"
 # os.environ["OPENAI_API_KEY"] = "your-key"
 
+CSV_HEADER = ("query_date", "title", "content", "url", "published_date")
+
 
 def search_bitcoin_history(date_query):
     """
@@ -83,35 +85,30 @@ def search_bitcoin_history(date_query):
 
 def save_to_csv(result, filename="bitcoin_history.csv"):
     """
-    Save the search results to a CSV file using pandas
+    Append the search results to a CSV file
 
     Args:
         result (dict): The formatted search results
         filename (str): Name of the CSV file to save to
     """
-    # Create a list of dictionaries for pandas DataFrame
-    rows = []
-    for item in result["results"]:
-        rows.append(
-            {
-                "query_date": result["query_date"],
-                "title": item["title"],
-                "content": item["content"],
-                "url": item["url"],
-                "published_date": item["published_date"],
-            }
+    # Write the header only when the file is new
+    new_file = not os.path.exists(filename)
+
+    with open(filename, "a", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if new_file:
+            writer.writerow(CSV_HEADER)
+        writer.writerows(
+            (
+                result["query_date"],
+                item["title"],
+                item["content"],
+                item["url"],
+                item["published_date"],
+            )
+            for item in result["results"]
         )
 
-    # Convert to DataFrame
-    df = pd.DataFrame(rows)
-
-    # Check if file exists to determine mode
-    mode = "a" if pd.io.common.file_exists(filename) else "w"
-    header = not pd.io.common.file_exists(filename)
-
-    # Save to CSV
-    df.to_csv(filename, mode=mode, header=header, index=False)
-
 
 def main():
     # Example usage
@@ -3,6 +3,7 @@
 import os
 import asyncio
 import logging
+import argparse
 from datetime import datetime, timedelta
 import json
 
@@ -21,8 +22,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def process_historical_dates():
-    """Process a range of historical dates."""
+async def process_historical_dates(max_concurrency=10):
+    """Process a range of historical dates.
+
+    All (date, query) pairs are processed concurrently, with at most
+    `max_concurrency` of them in flight to stay within the API rate limits.
+    """
     # Get API keys from environment variables
     exa_api_key = os.environ.get("EXA_API_KEY")
     openai_api_key = os.environ.get("OPENAI_API_KEY")
@@ -51,41 +56,57 @@ async def process_historical_dates():
         f"Processing {len(dates)} dates from {format_date_for_display(start_date)} to {format_date_for_display(end_date)}"
     )
 
-    # Process each date
-    all_events = []
-    for date in dates:
-        logger.info(f"Processing date: {format_date_for_display(date)}")
-
-        # Process date with two different queries
-        queries = [
-            "Bitcoin price crash news and market sentiment",
-            "Bitcoin cryptocurrency regulations and government actions",
-        ]
-
-        for query in queries:
-            logger.info(f"Running query: {query}")
-            search_result, events = await pipeline.process_date(
+    # Process each date with two different queries
+    queries = [
+        "Bitcoin price crash news and market sentiment",
+        "Bitcoin cryptocurrency regulations and government actions",
+    ]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def process(date, query):
+        async with semaphore:
+            logger.info(
+                f"Processing date: {format_date_for_display(date)}, query: {query}"
+            )
+            return await pipeline.process_date(
                 date=date,
                 base_query=query,
                 max_results=10,
             )
 
-            logger.info(f"Found {len(events)} events")
-
-            # Store events with metadata
-            for event in events:
-                all_events.append(
-                    {
-                        "date": format_date_for_display(event.event_date),
-                        "query_date": format_date_for_display(date),
-                        "query": query,
-                        "title": event.title,
-                        "description": event.description,
-                        "url": event.source_url,
-                        "rank": event.rank,
-                        "relevance_score": event.relevance_score,
-                    }
-                )
+    pairs = [(date, query) for date in dates for query in queries]
+    results = await asyncio.gather(
+        *[process(date, query) for date, query in pairs], return_exceptions=True
+    )
+
+    # Collect the events in date and query order
+    all_events = []
+    for (date, query), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            logger.error(
+                f"Failed to process {format_date_for_display(date)} ({query}): {result}"
+            )
+            continue
+
+        search_result, events = result
+        logger.info(
+            f"Found {len(events)} events for {format_date_for_display(date)} ({query})"
+        )
+
+        # Store events with metadata
+        for event in events:
+            all_events.append(
+                {
+                    "date": format_date_for_display(event.event_date),
+                    "query_date": format_date_for_display(date),
+                    "query": query,
+                    "title": event.title,
+                    "description": event.description,
+                    "url": event.source_url,
+                    "rank": event.rank,
+                    "relevance_score": event.relevance_score,
+                }
+            )
 
     # Save all events to a file
     output_file = f"bitcoin_events_{format_date_for_display(start_date)}_to_{format_date_for_display(end_date)}.json"
@@ -100,4 +121,13 @@ async def process_historical_dates():
 
 
 if __name__ == "__main__":
-    asyncio.run(process_historical_dates())
+    parser = argparse.ArgumentParser(description="Process a range of historical dates")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=10,
+        help="Maximum number of dates and queries processed at the same time",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(process_historical_dates(max_concurrency=args.max_concurrency))
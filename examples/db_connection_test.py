@@ -50,11 +50,11 @@ def test_db_connection():
             logger.info(f"  - {collection}: {count} documents")
 
         # Test search results collection
-        search_results_count = db.search_results.count_documents({})
+        search_results_count = db.search_results.estimated_document_count()
         logger.info(f"Search results: {search_results_count}")
 
         # Test events collection
-        events_count = db.events.count_documents({})
+        events_count = db.events.estimated_document_count()
         logger.info(f"Events: {events_count}")
 
         # Get events for a specific date
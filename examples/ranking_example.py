@@ -6,6 +6,8 @@ import logging
 from datetime import datetime
 import json
 
+import httpx
+
 from src.pipeline import (
     CryptoEventRankingPipeline,
     format_date_for_display,
@@ -19,7 +21,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def rank_bitcoin_halving_events():
+async def rank_bitcoin_halving_events(http_client=None):
     """Rank events related to Bitcoin halving."""
     # Get API key from environment variable
     openai_api_key = os.environ.get("OPENAI_API_KEY")
@@ -34,6 +36,7 @@ async def rank_bitcoin_halving_events():
     # Initialize pipeline
     pipeline = CryptoEventRankingPipeline(
         openai_api_key=openai_api_key,
+        http_client=http_client,
     )
 
     # Define date - Bitcoin halving in May 2020
@@ -104,7 +107,7 @@ async def rank_bitcoin_halving_events():
     logger.info(f"Saved results to {output_file}")
 
 
-async def rank_events_for_date_range():
+async def rank_events_for_date_range(http_client=None):
     """Rank events for a date range."""
     # Get API key from environment variable
     openai_api_key = os.environ.get("OPENAI_API_KEY")
@@ -119,6 +122,7 @@ async def rank_events_for_date_range():
     # Initialize pipeline
     pipeline = CryptoEventRankingPipeline(
         openai_api_key=openai_api_key,
+        http_client=http_client,
     )
 
     # Define date range - Bitcoin price crash in May 2021
@@ -193,13 +197,19 @@ async def main():
     """Run the examples."""
     logger.info("\033[1;35m=== Bitcoin News Ranking Examples ===\033[0m")
 
-    # Example 1: Rank events for Bitcoin halving
-    await rank_bitcoin_halving_events()
+    # Share one connection pool across the examples, so they reuse connections
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    ) as http_client:
+        # Example 1: Rank events for Bitcoin halving
+        await rank_bitcoin_halving_events(http_client)
 
-    logger.info("\n")
+        logger.info("\n")
 
-    # Example 2: Rank events for a date range
-    await rank_events_for_date_range()
+        # Example 2: Rank events for a date range
+        await rank_events_for_date_range(http_client)
 
 
 if __name__ == "__main__":
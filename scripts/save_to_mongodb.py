@@ -13,6 +13,8 @@ from typing import Dict, List
 # Add the src directory to the path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from pymongo.errors import BulkWriteError
+
 from src.db import MongoDB
 from src.models import Event, SearchResult
 
@@ -113,8 +115,8 @@ def main():
         except Exception as e:
             logger.error(f"Failed to save search result: {str(e)}")
 
-    # Save events to MongoDB
-    saved_events = 0
+    # Build the events, then save them to MongoDB in one go
+    event_objects = []
     for i, event_data in enumerate(events):
         try:
             # Parse event date
@@ -162,19 +164,24 @@ def main():
                 relevance_reasoning=event_data.get("relevance_reasoning", None),
                 rank=event_data.get("rank", None),
             )
-
-            # Save to MongoDB
-            event_id = db.save_event(event)
-            saved_events += 1
-
-            if i < 5 or i % 10 == 0:  # Log first 5 and then every 10th
-                logger.info(
-                    f"Saved event {i+1}/{len(events)} to MongoDB with ID: {event_id}"
-                )
+            event_objects.append(event)
 
         except Exception as e:
             logger.error(f"Failed to save event {i+1}: {str(e)}")
 
+    saved_events = 0
+    try:
+        saved_events = len(db.save_events(event_objects))
+    except BulkWriteError as e:
+        # The insert is unordered, so every event without an error was still saved
+        saved_events = e.details["nInserted"]
+        logger.error(f"Failed to save {len(e.details['writeErrors'])} events")
+        for error in e.details["writeErrors"]:
+            title = event_objects[error["index"]].title
+            logger.error(f"Failed to save event '{title}': {error['errmsg']}")
+    except Exception as e:
+        logger.error(f"Failed to save events: {str(e)}")
+
     logger.info(f"Saved {saved_events} of {len(events)} events to MongoDB")
 
 
@@ -11,6 +11,7 @@ from src.pipeline import (
     CryptoEventPipeline,
     parse_date_string,
     generate_date_range,
+    sort_events_by_rank,
     summarize_events,
     summarize_search_results,
 )
@@ -93,7 +94,7 @@ async def run_pipeline(args):
             if events:
                 logger.info(f"Date: {date.strftime('%Y-%m-%d')} - {len(events)} events")
                 for i, event in enumerate(
-                    sorted(events, key=lambda e: e.rank or float("inf"))[:3]
+                    sort_events_by_rank(events)[:3]
                 ):
                     logger.info(f"  Event {i+1}: {event.title} (Rank: {event.rank})")
 
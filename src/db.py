@@ -2,14 +2,18 @@
 
 import logging
 import os
+import shutil
 import subprocess
+import tempfile
 import atexit
 import time
 import signal
 import sys
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+import pymongo
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
@@ -19,6 +23,22 @@ from src.models import Event, SearchResult
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8)
+def get_mongo_client(port: int = 27017) -> MongoClient:
+    """Get the client for the local MongoDB on a port, shared across the process.
+
+    Each MongoClient owns a connection pool and monitor threads, so the daemon
+    manager and every MongoDB instance reuse the same client instead.
+
+    Args:
+        port: Port number of the MongoDB instance
+
+    Returns:
+        MongoDB client
+    """
+    return MongoClient(f"mongodb://localhost:{port}", serverSelectionTimeoutMS=2000)
+
+
 class MongoDBDaemon:
     """MongoDB daemon manager for starting and stopping a local MongoDB instance."""
 
@@ -27,6 +47,7 @@ class MongoDBDaemon:
         data_path: str = "./db",
         log_path: str = "./logs/mongodb.log",
         port: int = 27017,
+        in_memory: bool = False,
     ):
         """Initialize MongoDB daemon manager.
 
@@ -34,12 +55,18 @@ class MongoDBDaemon:
             data_path: Path to the MongoDB data directory
             log_path: Path to the MongoDB log file
             port: Port number for the MongoDB instance
+            in_memory: Keep the data in a temporary directory on tmpfs (when
+                available) instead of `data_path`, for fast tests and development.
+                The data is not durable and is deleted when the daemon stops.
         """
-        # Create directories if they don't exist
-        os.makedirs(data_path, exist_ok=True)
+        # Create directories if they don't exist. In-memory data gets its temporary
+        # directory when the server is started
+        if not in_memory:
+            os.makedirs(data_path, exist_ok=True)
         os.makedirs(os.path.dirname(log_path), exist_ok=True)
 
-        self.data_path = os.path.abspath(data_path)
+        self.in_memory = in_memory
+        self.data_path = None if in_memory else os.path.abspath(data_path)
         self.log_path = os.path.abspath(log_path)
         self.port = port
         self.process = None
@@ -50,60 +77,80 @@ class MongoDBDaemon:
 
         Returns:
             MongoDB client connected to the running instance
+
+        Raises:
+            RuntimeError: If an in-memory instance is requested but a MongoDB server
+                is already running on the port
         """
+        # Check if MongoDB is already running on this port
+        existing_client = get_mongo_client(self.port)
         try:
-            # Check if MongoDB is already running on this port
-            existing_client = MongoClient(
-                f"mongodb://localhost:{self.port}", serverSelectionTimeoutMS=1000
-            )
-            existing_client.admin.command("ping")
+            with pymongo.timeout(1):
+                existing_client.admin.command("ping")
+            already_running = True
+        except Exception:
+            already_running = False
+
+        if already_running:
+            if self.in_memory:
+                raise RuntimeError(
+                    f"MongoDB is already running on port {self.port}, "
+                    "so an in-memory instance can't be started there"
+                )
             logger.info(f"MongoDB already running on port {self.port}")
             self.client = existing_client
             return self.client
-        except Exception as e:
-            # Start MongoDB with our custom path
-            logger.info(f"Starting MongoDB with data path: {self.data_path}")
+
+        if self.in_memory:
+            shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            self.data_path = tempfile.mkdtemp(prefix="bitcoin_news_db_", dir=shm_dir)
+
+        # Start MongoDB with our custom path
+        logger.info(f"Starting MongoDB with data path: {self.data_path}")
+        args = [
+            "mongod",
+            "--dbpath",
+            self.data_path,
+            "--logpath",
+            self.log_path,
+            "--port",
+            str(self.port),
+            "--bind_ip",
+            "127.0.0.1",
+        ]
+        if self.in_memory:
+            # The data is in RAM already, so keep the cache small
+            args += ["--wiredTigerCacheSizeGB", "0.25"]
+        try:
             self.process = subprocess.Popen(
-                [
-                    "mongod",
-                    "--dbpath",
-                    self.data_path,
-                    "--logpath",
-                    self.log_path,
-                    "--port",
-                    str(self.port),
-                    "--bind_ip",
-                    "127.0.0.1",
-                ],
+                args,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.STDOUT,
             )
-
-            # Register shutdown handler
-            atexit.register(self.stop)
-
-            # Wait for MongoDB to start up
-            max_retries = 10
-            for i in range(max_retries):
-                try:
-                    time.sleep(1)
-                    self.client = MongoClient(
-                        f"mongodb://localhost:{self.port}",
-                        serverSelectionTimeoutMS=2000,
-                    )
-                    self.client.admin.command("ping")
-                    logger.info("MongoDB started successfully")
-                    return self.client
-                except Exception as e:
-                    if i == max_retries - 1:
-                        logger.error(
-                            f"Failed to start MongoDB after {max_retries} attempts: {e}"
-                        )
-                        self.stop()
-                        raise
-                    logger.info(
-                        f"Waiting for MongoDB to start (attempt {i+1}/{max_retries})..."
-                    )
+        except OSError:
+            self._remove_in_memory_data()
+            raise
+
+        # Register shutdown handler
+        atexit.register(self.stop)
+
+        # Wait for MongoDB to start up. The ping returns as soon as the server
+        # accepts connections, so there is no fixed sleep before the first one
+        self.client = get_mongo_client(self.port)
+        max_retries = 10
+        for i in range(max_retries):
+            try:
+                self.client.admin.command("ping")
+                logger.info("MongoDB started successfully")
+                return self.client
+            except Exception as e:
+                if i == max_retries - 1 or self.process.poll() is not None:
+                    logger.error(f"Failed to start MongoDB: {e}")
+                    self.stop()
+                    raise
+                logger.info(
+                    f"Waiting for MongoDB to start (attempt {i+1}/{max_retries})..."
+                )
 
     def stop(self) -> None:
         """Stop the MongoDB instance."""
@@ -113,6 +160,18 @@ class MongoDBDaemon:
             self.process.wait()
             self.process = None
             logger.info("MongoDB stopped")
+        self._remove_in_memory_data()
+
+    def _remove_in_memory_data(self) -> None:
+        """Delete the temporary data directory of an in-memory instance."""
+        if self.in_memory and self.data_path:
+            shutil.rmtree(self.data_path, ignore_errors=True)
+            self.data_path = None
+
+    def __del__(self) -> None:
+        """Delete the in-memory data once no server uses it anymore."""
+        if getattr(self, "in_memory", False) and self.process is None:
+            self._remove_in_memory_data()
 
     def get_client(self) -> MongoClient:
         """Get a MongoDB client connection.
@@ -279,9 +338,7 @@ class MongoDB:
         """
         try:
             # Try to connect to MongoDB
-            self.client = MongoClient(
-                f"mongodb://localhost:{self.port}", serverSelectionTimeoutMS=2000
-            )
+            self.client = get_mongo_client(self.port)
             self.client.admin.command("ping")
             logger.info(f"Connected to MongoDB on port {self.port}")
             self.db = self.client[self.db_name]
@@ -322,9 +379,10 @@ class MongoDB:
                 "collection_stats": {},
             }
 
+            # Use the collection metadata instead of scanning every document
             for collection in collections:
                 try:
-                    count = self.db[collection].count_documents({})
+                    count = self.db[collection].estimated_document_count()
                     stats["collection_stats"][collection] = count
                 except Exception as e:
                     stats["collection_stats"][collection] = f"Error: {str(e)}"
@@ -347,6 +405,10 @@ class MongoDB:
             self.search_results.create_index([("query", "text")])
 
             # Create indexes for events collection
+            # get_events_by_date filters on a date range and sorts by rank. A
+            # (rank, event_date) index would avoid the in-memory sort, but it has to
+            # walk the whole index to find one day's events. The date index reads only
+            # that day, and sorting its few events in memory is cheap
             self.events.create_index("event_date")
             self.events.create_index("search_result_id")
             self.events.create_index("provider")
@@ -447,6 +509,25 @@ class MongoDB:
 
         return str(result.inserted_id)
 
+    def save_events(self, events: List[Event]) -> List[str]:
+        """Save several events to the database in a single round trip.
+
+        Args:
+            events: Event objects to save
+
+        Returns:
+            IDs of the saved events, in the same order as `events`
+        """
+        if not events:
+            return []
+
+        # Insert into database; unordered inserts let the server batch the writes
+        result = self.events.insert_many(
+            [event.model_dump() for event in events], ordered=False
+        )
+
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
     def update_event(self, event: Event) -> bool:
         """Update an event in the database.
 
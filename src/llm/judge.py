@@ -1,9 +1,12 @@
 """LLM-based judge for evaluating search results."""
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 from src.models import SearchResult
@@ -38,7 +41,7 @@ class CryptoEvents(BaseModel):
 
 
 JUDGE_SYSTEM_PROMPT = """I am researching significant geopolitical and social Bitcoin or cryptocurrency events. 
-You will be presented search results for events that should have occurred around {{formatted_date}}, but pay attention to the published dates and the dates in the content.
+You will be presented search results for events that should have occurred around the target date given in the user message, but pay attention to the published dates and the dates in the content.
 I am based in London, UK, so include 1-2 events that relate to the UK and Europe if they are relevant for our topic.
 
 ### Task
@@ -50,7 +53,7 @@ Even if you do not provide any results, you must include a reasoning why you hav
 
 ### Relevance criteria
 1. The content must be about Bitcoin or cryptocurrency.
-2. The event must have occurred around the following date: {{formatted_date}} and we prioritize events on this date.
+2. The event must have occurred around the target date and we prioritize events on this date.
 3. The information should be factual and contain actual events, not just speculation or opinion.
 4. The event must be significant and have a clear impact on Bitcoin or cryptocurrency. Include also social and cultural reference that suggest the rising significance and adoption of crypto assets.
 5. Prioritize reputable sources, such as Wikipedia, bitcoinwiki.org, coindesk.com, cointelegraph.com, blockchain.com, bitcoin.com, etc.
@@ -91,19 +94,133 @@ Return a JSON object with these fields:
 """
 
 
+# Upper bound on judge output tokens: the reasoning plus 5 events with a short title
+# and description fit well below this, so it only cuts off runaway generations
+JUDGE_MAX_TOKENS = 1500
+
+# Start of every judge user message. The search results follow it and the query and
+# date go last, so everything before the results is a fixed prefix across calls
+JUDGE_USER_PREFIX = "Search results:\n------\n"
+
+# Batch API statuses after which the batch will not change anymore
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def strict_json_schema(schema: Any) -> Any:
+    """Make a Pydantic JSON schema strict, as required by structured outputs.
+
+    Every object gets all of its properties required and no additional properties.
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    schema = {
+        key: strict_json_schema(value)
+        for key, value in schema.items()
+        if key != "default"
+    }
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    return schema
+
+
+# Structured output format of the judge for Batch API requests, which take the
+# response format as plain JSON instead of a Pydantic model
+JUDGE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "schema": strict_json_schema(CryptoEvents.model_json_schema()),
+        "name": CryptoEvents.__name__,
+        "strict": True,
+    },
+}
+
+
+def batch_request_index(record: Dict[str, Any], num_requests: int) -> int:
+    """Get the request index of a Batch API output or error line from its custom_id"""
+    index = int(record["custom_id"])
+    if not 0 <= index < num_requests:
+        raise ValueError(f"Unknown custom_id: {index}")
+    return index
+
+
+# Placeholder that custom system prompts can use for the target date
+DATE_PLACEHOLDER = "{{formatted_date}}"
+
+
+@lru_cache(maxsize=64)
+def split_system_prompt(system_prompt: str) -> Tuple[str, ...]:
+    """Split a system prompt around the date placeholder, once per distinct prompt."""
+    return tuple(system_prompt.split(DATE_PLACEHOLDER))
+
+
+@lru_cache(maxsize=1024)
+def format_query_date(query_date: datetime) -> str:
+    """Format a query date for the judge prompts, e.g. "March 13, 2021"."""
+    return query_date.strftime("%B %d, %Y")
+
+
 class EventJudge:
     """OpenAI-based judge for evaluating search results."""
 
-    def __init__(self, client: AsyncOpenAI, model_name: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model_name: str = "gpt-4o-mini",
+        max_concurrency: int = 8,
+    ):
         """Initialize OpenAI judge.
 
         Args:
             client: AsyncOpenAI client
             model_name: OpenAI model name to use
+            max_concurrency: Maximum number of judge calls in flight across all
+                evaluations using this judge, to stay within API rate limits
         """
         self.client = client
         self.model = model_name
         self.system_prompt = JUDGE_SYSTEM_PROMPT
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _build_messages(
+        self,
+        search_result: SearchResult,
+        query: str,
+        query_date: datetime,
+        system_prompt: str | None = None,
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for a judge call.
+
+        Args:
+            search_result: Search result to evaluate
+            query: The search query
+            query_date: Date the search is about
+            system_prompt: Optional system prompt override
+
+        Returns:
+            List of chat messages
+        """
+        formatted_date = format_query_date(query_date)
+        combined_content = search_result.format_results_for_prompt()
+
+        # The default system prompt doesn't depend on the date, so it is a byte-identical
+        # prefix across calls that the provider can cache. Custom prompts may still use
+        # the {{formatted_date}} placeholder. The per-call query and date are kept at
+        # the end of the user message, after the fixed prefix and the results.
+        if system_prompt is None or system_prompt == self.system_prompt:
+            system_content = self.system_prompt
+        else:
+            system_content = formatted_date.join(split_system_prompt(system_prompt))
+
+        return [
+            {"role": "system", "content": system_content},
+            {
+                "role": "user",
+                "content": f"{JUDGE_USER_PREFIX}{combined_content}\n------\nPlease evaluate the search results above for this query: {query}\nTarget date: {formatted_date}\n",
+            },
+        ]
 
     async def evaluate_relevance(
         self,
@@ -112,51 +229,257 @@ class EventJudge:
         query_date: datetime,
         system_prompt: str | None = None,
         model: str | None = None,
+        raise_errors: bool = False,
     ) -> CryptoEvents:
         """Evaluate if a search result is relevant for Bitcoin/crypto on a specific date.
 
         Args:
             search_result: Search result to evaluate
             query_date: Date the search is about
+            raise_errors: Raise judge call errors instead of returning a default
+                response without events
 
         Returns:
             JudgeResponse object with evaluation results
         """
-        formatted_date = query_date.strftime("%B %d, %Y")
-
-        combined_content = search_result.format_results_for_prompt()
+        formatted_date = format_query_date(query_date)
 
         try:
             # Generate response
-            logger.info(f"Evaluating relevance with OpenAI for date: {formatted_date}")
-
-            if system_prompt is None:
-                system_prompt = self.system_prompt
-
-            completion = await self.client.beta.chat.completions.parse(
-                model=model or self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt.replace(
-                            "{{formatted_date}}", formatted_date
-                        ),
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Please evaluate search results of this query: {query} focused on {formatted_date}.\nSearch results:\n------\n{combined_content}\n------\n",
-                    },
-                ],
-                response_format=CryptoEvents,
-            )
+            logger.info("Evaluating relevance with OpenAI for date: %s", formatted_date)
+
+            async with self.semaphore:
+                completion = await self.client.beta.chat.completions.parse(
+                    model=model or self.model,
+                    messages=self._build_messages(
+                        search_result, query, query_date, system_prompt
+                    ),
+                    response_format=CryptoEvents,
+                    temperature=0,
+                    max_tokens=JUDGE_MAX_TOKENS,
+                )
 
             events = completion.choices[0].message.parsed
             return events
 
         except Exception as e:
-            logger.error(f"OpenAI evaluation error: {str(e)}")
+            logger.error("OpenAI evaluation error: %s", e)
+            if raise_errors:
+                raise
             # Return default response in case of error
             return CryptoEvents(
                 reasoning=f"Error during evaluation: {str(e)}",
                 events=[],
             )
+
+    async def evaluate_relevance_concurrently(
+        self,
+        search_result: SearchResult,
+        query: str,
+        query_date: datetime,
+        system_prompt: str | None = None,
+        model: str | None = None,
+        chunk_size: int = 5,
+        max_events: int = 5,
+        raise_errors: bool = False,
+    ) -> CryptoEvents:
+        """Evaluate search results in chunks with concurrent judge calls.
+
+        The results are split into chunks of `chunk_size` items that are judged in
+        parallel (bounded by the judge's `max_concurrency`), so the latency is driven
+        by the slowest chunk instead of a single completion over all results.
+
+        Args:
+            search_result: Search result to evaluate
+            query: The search query
+            query_date: Date the search is about
+            system_prompt: Optional system prompt override
+            model: Optional model override
+            chunk_size: Number of search results per judge call
+            max_events: Maximum number of events to keep after merging
+            raise_errors: Raise the first failed chunk's error instead of merging
+                the chunks that succeeded
+
+        Returns:
+            CryptoEvents with the merged events sorted by score
+        """
+        results = search_result.results
+        chunks = [
+            results[i : i + chunk_size] for i in range(0, len(results), chunk_size)
+        ]
+        if len(chunks) <= 1:
+            return await self.evaluate_relevance(
+                search_result=search_result,
+                query=query,
+                query_date=query_date,
+                system_prompt=system_prompt,
+                model=model,
+                raise_errors=raise_errors,
+            )
+
+        chunk_events = await asyncio.gather(
+            *[
+                self.evaluate_relevance(
+                    search_result=search_result.model_copy(update={"results": chunk}),
+                    query=query,
+                    query_date=query_date,
+                    system_prompt=system_prompt,
+                    model=model,
+                    raise_errors=raise_errors,
+                )
+                for chunk in chunks
+            ],
+            return_exceptions=True,
+        )
+        if raise_errors:
+            for result in chunk_events:
+                if isinstance(result, BaseException):
+                    raise result
+
+        return merge_crypto_events(chunk_events, max_events=max_events)
+
+    async def evaluate_relevance_batch(
+        self,
+        requests: List[Tuple[SearchResult, str, datetime]],
+        system_prompt: str | None = None,
+        model: str | None = None,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 300.0,
+    ) -> List[CryptoEvents]:
+        """Evaluate many search results through the OpenAI Batch API.
+
+        Batch requests are billed at half the price of real-time calls but may take
+        up to the 24h completion window, so this is meant for offline workloads.
+
+        Args:
+            requests: Tuples of (search result, query, query date) to evaluate
+            system_prompt: Optional system prompt override
+            model: Optional model override
+            poll_interval: Initial delay between batch status checks in seconds
+            max_poll_interval: Maximum delay between batch status checks in seconds
+
+        Returns:
+            List of CryptoEvents in the same order as `requests`
+        """
+        if not requests:
+            return []
+
+        lines = []
+        for i, (search_result, query, query_date) in enumerate(requests):
+            lines.append(
+                orjson.dumps(
+                    {
+                        "custom_id": str(i),
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": model or self.model,
+                            "messages": self._build_messages(
+                                search_result, query, query_date, system_prompt
+                            ),
+                            "response_format": JUDGE_RESPONSE_FORMAT,
+                            "temperature": 0,
+                            "max_tokens": JUDGE_MAX_TOKENS,
+                        },
+                    }
+                )
+            )
+
+        batch_file = await self.client.files.create(
+            file=("judge_batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info(
+            "Submitted judge batch %s with %d requests", batch.id, len(requests)
+        )
+
+        delay = poll_interval
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+            logger.info("Judge batch %s status: %s", batch.id, batch.status)
+
+        results = [
+            CryptoEvents(reasoning=f"Batch {batch.status}: no output", events=[])
+            for _ in requests
+        ]
+        if not batch.output_file_id and not batch.error_file_id:
+            logger.error("Judge batch %s finished without output", batch.id)
+            return results
+
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            # Decode the raw bytes directly, skipping the text decode step
+            for line in output.content.splitlines():
+                if not line.strip():
+                    continue
+                index = None
+                try:
+                    record = orjson.loads(line)
+                    index = batch_request_index(record, len(results))
+                    content = record["response"]["body"]["choices"][0]["message"][
+                        "content"
+                    ]
+                    results[index] = CryptoEvents.model_validate_json(content)
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    logger.error("Invalid batch output for request %s: %s", index, e)
+                    if index is not None:
+                        results[index] = CryptoEvents(
+                            reasoning=f"Error during evaluation: {str(e)}", events=[]
+                        )
+
+        # Requests that failed are only listed in the error file
+        if batch.error_file_id:
+            errors = await self.client.files.content(batch.error_file_id)
+            for line in errors.content.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = orjson.loads(line)
+                    index = batch_request_index(record, len(results))
+                    error = record.get("error") or record["response"]["body"]["error"]
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error("Invalid batch error line: %s", e)
+                    continue
+                logger.error("Judge batch request %s failed: %s", index, error)
+                results[index] = CryptoEvents(
+                    reasoning=f"Error during evaluation: {error}", events=[]
+                )
+
+        return results
+
+
+def merge_crypto_events(
+    chunk_events: List[CryptoEvents | BaseException], max_events: int = 5
+) -> CryptoEvents:
+    """Merge the judge outputs of several chunks into a single CryptoEvents.
+
+    Events are deduplicated by URL (keeping the highest score) and sorted by score.
+
+    Args:
+        chunk_events: Judge outputs, possibly containing exceptions from gather
+        max_events: Maximum number of events to keep
+
+    Returns:
+        Merged CryptoEvents object
+    """
+    reasonings = []
+    events_by_url: Dict[str, CryptoEvent] = {}
+    for result in chunk_events:
+        if isinstance(result, BaseException):
+            logger.error("Judge chunk failed: %s", result)
+            continue
+        reasonings.append(result.reasoning)
+        for event in result.events:
+            existing = events_by_url.get(event.url)
+            if existing is None or event.score > existing.score:
+                events_by_url[event.url] = event
+
+    events = sorted(events_by_url.values(), key=lambda e: e.score, reverse=True)
+    return CryptoEvents(reasoning="\n\n".join(reasonings), events=events[:max_events])
@@ -6,6 +6,7 @@ from src.pipeline.utils import (
     format_date_for_display,
     parse_date_string,
     generate_date_range,
+    sort_events_by_rank,
     summarize_events,
     summarize_search_results,
 )
@@ -16,6 +17,7 @@ __all__ = [
     "format_date_for_display",
     "parse_date_string",
     "generate_date_range",
+    "sort_events_by_rank",
     "summarize_events",
     "summarize_search_results",
 ]
@@ -1,13 +1,15 @@
 """End-to-end workflow for finding and storing crypto events."""
 
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Tuple, Optional, Dict, Any
 
+import httpx
 from openai import AsyncOpenAI
 
 from src.db import MongoDB
-from src.llm.judge import EventJudge, JUDGE_SYSTEM_PROMPT
+from src.llm.judge import CryptoEvents, EventJudge, JUDGE_SYSTEM_PROMPT
 from src.models import Event, SearchResult
 from src.search.exa import ExaSearch
 
@@ -28,6 +30,8 @@ class CryptoEventPipeline:
         exa_api_key: str,
         openai_api_key: str,
         openai_model: str = "gpt-4o-mini",
+        openai_base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
         db_path: str = "./db",
         log_path: str = "./logs/mongodb.log",
         db_port: int = 27017,
@@ -40,6 +44,8 @@ class CryptoEventPipeline:
             exa_api_key: API key for Exa search
             openai_api_key: API key for OpenAI
             openai_model: OpenAI model to use for evaluation and ranking
+            openai_base_url: Optional base URL for an OpenAI-compatible API
+            http_client: Optional shared HTTP client to reuse connections across pipelines
             db_path: Path to store MongoDB data
             log_path: Path to store MongoDB logs
             db_port: MongoDB port
@@ -50,7 +56,9 @@ class CryptoEventPipeline:
         self.search_client = ExaSearch(api_key=exa_api_key)
 
         # Initialize OpenAI client
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+        self.openai_client = AsyncOpenAI(
+            api_key=openai_api_key, base_url=openai_base_url, http_client=http_client
+        )
 
         # Initialize judge
         self.judge = EventJudge(client=self.openai_client, model_name=openai_model)
@@ -88,7 +96,9 @@ class CryptoEventPipeline:
         )
         # If we need exact date, limit to news for following 7 days // for month, pick 37
         published_window_days = 37 if full_month else 7
-        search_result = self.search_client.search(
+        # The Exa client is synchronous, so run it in a thread to keep the event loop free
+        search_result = await asyncio.to_thread(
+            self.search_client.search,
             query=formatted_query,
             search_date=date,
             max_results=max_results,
@@ -104,6 +114,8 @@ class CryptoEventPipeline:
         date: datetime,
         judge_system_prompt: str,
         judge_model: str,
+        judge_chunk_size: Optional[int] = None,
+        raise_errors: bool = False,
     ) -> List[Event]:
         """Rank search results and convert to Event objects without database operations.
 
@@ -113,20 +125,72 @@ class CryptoEventPipeline:
             date: Date being processed
             judge_system_prompt: System prompt for the judge
             judge_model: Model to use for judging
+            judge_chunk_size: If set, judge the results in concurrent chunks of this size
+            raise_errors: Raise judge errors instead of returning no (or partial) events
 
         Returns:
             List of Event objects that were found and ranked
         """
         # Evaluate relevance with judge
-        crypto_events = await self.judge.evaluate_relevance(
-            search_result=search_result,
-            query=formatted_query,
-            query_date=date,
-            model=judge_model,
+        if judge_chunk_size:
+            crypto_events = await self.judge.evaluate_relevance_concurrently(
+                search_result=search_result,
+                query=formatted_query,
+                query_date=date,
+                model=judge_model,
+                system_prompt=judge_system_prompt,
+                chunk_size=judge_chunk_size,
+                raise_errors=raise_errors,
+            )
+        else:
+            crypto_events = await self.judge.evaluate_relevance(
+                search_result=search_result,
+                query=formatted_query,
+                query_date=date,
+                model=judge_model,
+                system_prompt=judge_system_prompt,
+                raise_errors=raise_errors,
+            )
+
+        return self._to_events(crypto_events, date)
+
+    async def rank_search_results_batch(
+        self,
+        requests: List[Tuple[SearchResult, str, datetime]],
+        judge_system_prompt: str,
+        judge_model: str,
+    ) -> List[List[Event]]:
+        """Rank many search results at once through the OpenAI Batch API.
+
+        Args:
+            requests: Tuples of (search result, formatted query, date) to rank
+            judge_system_prompt: System prompt for the judge
+            judge_model: Model to use for judging
+
+        Returns:
+            List of Event lists in the same order as `requests`
+        """
+        batch_events = await self.judge.evaluate_relevance_batch(
+            requests=requests,
             system_prompt=judge_system_prompt,
+            model=judge_model,
         )
 
-        # Convert judge results to Event objects
+        return [
+            self._to_events(crypto_events, date)
+            for crypto_events, (_, _, date) in zip(batch_events, requests)
+        ]
+
+    def _to_events(self, crypto_events: CryptoEvents, date: datetime) -> List[Event]:
+        """Convert judge results to Event objects.
+
+        Args:
+            crypto_events: Judge output to convert
+            date: Date being processed, used when an event date is invalid
+
+        Returns:
+            List of Event objects
+        """
         events = []
         for i, crypto_event in enumerate(crypto_events.events):
             # Parse event date
@@ -189,30 +253,45 @@ class CryptoEventPipeline:
             max_results=max_results,
         )
 
-        # Step 2: Save search result to database if requested
-        search_result_id = None
-        if save_results:
-            search_result_id = self.db.save_search_result(search_result)
-            search_result.id = search_result_id
-            logger.info(f"Saved search result with ID: {search_result_id}")
-
-        # Step 3: Rank search results
-        events = await self._rank_search_results(
+        # Step 2 and 3: Save search result to database if requested, while ranking
+        # the search results, since the ranking doesn't depend on the saved ID
+        ranking = self._rank_search_results(
             search_result=search_result,
             formatted_query=formatted_query,
             date=date,
             judge_system_prompt=judge_system_prompt,
             judge_model=judge_model,
         )
+        search_result_id = None
+        if save_results:
+            tasks = [
+                asyncio.create_task(
+                    asyncio.to_thread(self.db.save_search_result, search_result)
+                ),
+                asyncio.create_task(ranking),
+            ]
+            try:
+                search_result_id, events = await asyncio.gather(*tasks)
+            except BaseException:
+                # Don't leave the other step running (and spending tokens) unawaited
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            search_result.id = search_result_id
+            logger.info(f"Saved search result with ID: {search_result_id}")
+        else:
+            events = await ranking
 
         # Step 4: Update events with search_result_id and save to database if requested
         if save_results:
             logger.info(f"Saving {len(events)} events to database")
             for event in events:
                 event.search_result_id = search_result_id
-                event_id = self.db.save_event(event)
+            event_ids = await asyncio.to_thread(self.db.save_events, events)
+            for event, event_id in zip(events, event_ids):
                 event.id = event_id
-                logger.info(f"Saved event with ID: {event_id}")
+            logger.info(f"Saved events with IDs: {event_ids}")
 
         return search_result, events
 
@@ -4,10 +4,12 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 
+import httpx
+
 from src.db import MongoDB
 from src.llm.ranker import EventRanker
 from src.models import Event
-from src.pipeline.utils import format_date_for_display
+from src.pipeline.utils import format_date_for_display, sort_events_by_rank
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +26,7 @@ class CryptoEventRankingPipeline:
         self,
         openai_api_key: str,
         openai_model: str = "gpt-4o-mini",
+        http_client: Optional[httpx.AsyncClient] = None,
         db_path: str = "./db",
         log_path: str = "./logs/mongodb.log",
         db_port: int = 27017,
@@ -35,6 +38,7 @@ class CryptoEventRankingPipeline:
         Args:
             openai_api_key: API key for OpenAI
             openai_model: OpenAI model to use for ranking
+            http_client: Optional shared HTTP client to reuse connections across pipelines
             db_path: Path to store MongoDB data
             log_path: Path to store MongoDB logs
             db_port: MongoDB port
@@ -44,7 +48,9 @@ class CryptoEventRankingPipeline:
         from openai import AsyncOpenAI
 
         # Initialize OpenAI client
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+        self.openai_client = AsyncOpenAI(
+            api_key=openai_api_key, http_client=http_client
+        )
 
         # Initialize ranker
         self.ranker = EventRanker(client=self.openai_client, model_name=openai_model)
@@ -226,7 +232,7 @@ class CryptoEventRankingPipeline:
             List of top N ranked events
         """
         # Sort events by rank
-        sorted_events = sorted(events, key=lambda e: e.rank or float("inf"))
+        sorted_events = sort_events_by_rank(events)
 
         # Return top N events
         return sorted_events[:top_n]
@@ -1,6 +1,7 @@
 """Utility functions for the crypto event pipeline."""
 
 import logging
+from operator import attrgetter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
@@ -60,6 +61,21 @@ def generate_date_range(start_date: datetime, end_date: datetime) -> List[dateti
     return date_range
 
 
+def sort_events_by_rank(events: List[Event]) -> List[Event]:
+    """Sort events by rank, with unranked events last in their original order.
+
+    Args:
+        events: List of events to sort
+
+    Returns:
+        New list of events sorted by rank
+    """
+    ranked = [event for event in events if event.rank is not None]
+    ranked.sort(key=attrgetter("rank"))
+    ranked.extend(event for event in events if event.rank is None)
+    return ranked
+
+
 def summarize_events(events: List[Event]) -> Dict[str, Any]:
     """Summarize a list of events.
 
@@ -77,9 +93,7 @@ def summarize_events(events: List[Event]) -> Dict[str, Any]:
         }
 
     # Sort events by rank
-    sorted_events = sorted(
-        events, key=lambda e: e.rank if e.rank is not None else float("inf")
-    )
+    sorted_events = sort_events_by_rank(events)
 
     # Get date range
     dates = [event.event_date for event in events]
@@ -74,7 +74,7 @@ class ExaSearch:
 
         try:
             # Execute search
-            logger.info(f"Executing Exa search with query: {query}")
+            logger.info("Executing Exa search with query: %s", query)
             response = self.client.search_and_contents(query, **search_params)
 
             # Transform response into expected format
@@ -109,7 +109,7 @@ class ExaSearch:
             return result
 
         except Exception as e:
-            logger.error(f"Exa search error: {str(e)}")
+            logger.error("Exa search error: %s", e)
             raise
 
     def format_crypto_query(
@@ -0,0 +1,97 @@
+"""Tests for the web app components."""
+
+import os
+import tempfile
+import unittest
+from itertools import product
+
+from fasthtml.common import to_xml
+
+
+def import_app():
+    """Import the app module without leaving a session key file in the repo."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            import app
+        finally:
+            os.chdir(cwd)
+    return app
+
+
+class TestCardTemplates(unittest.TestCase):
+    """Test that the templated cards match the component tree."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = import_app()
+
+    def test_card_matches_component_tree(self):
+        """Test every combination of optional card parts, with escaped values."""
+        app = self.app
+        for show_description, highlights, summary, reasoning in product(
+            [True, False], [None, "h1 & <h2>"], [None, "{summary}"], [None, "it's 5"]
+        ):
+            with self.subTest(
+                show_description=show_description,
+                highlights=highlights,
+                summary=summary,
+                reasoning=reasoning,
+            ):
+                url = "https://coindesk.com/a?x=1&y=2"
+                expected = to_xml(
+                    app.BaseCardTree(
+                        title="Bitcoin <b>hits</b> $1",
+                        url=url,
+                        display_url=app.format_display_url(url),
+                        meta="Date: 2021-03-13 | Relevance: 5",
+                        description='Price "rallies" {0}',
+                        highlights=highlights,
+                        summary=summary,
+                        relevance_reasoning=reasoning,
+                        show_description_in_card=show_description,
+                    )
+                )
+                card = app.BaseCard(
+                    title="Bitcoin <b>hits</b> $1",
+                    url=url,
+                    date="Date: 2021-03-13",
+                    score_or_relevance=5,
+                    score_label="Relevance",
+                    description='Price "rallies" {0}',
+                    highlights=highlights,
+                    summary=summary,
+                    relevance_reasoning=reasoning,
+                    show_description_in_card=show_description,
+                )
+                self.assertEqual(to_xml(card), expected)
+
+
+class TestSearchPageETag(unittest.TestCase):
+    """Test the ETag revalidation of the search page."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = import_app()
+
+    def test_etag_per_representation(self):
+        """Test that the full page and the htmx partial get different weak tags."""
+        app = self.app
+        full = app.search_page_etag("query", "2021-03-13", "model")
+        partial = app.search_page_etag("query", "2021-03-13", "model", True)
+        self.assertNotEqual(full, partial)
+        self.assertTrue(full.startswith('W/"'))
+
+    def test_etag_matches(self):
+        """Test that If-None-Match is parsed as a list of exact tags."""
+        app = self.app
+        self.assertTrue(app.etag_matches('W/"abc"', '"x", W/"abc"'))
+        self.assertTrue(app.etag_matches('W/"abc"', '"abc"'))
+        self.assertTrue(app.etag_matches('W/"abc"', "*"))
+        self.assertFalse(app.etag_matches('W/"abc"', '"abcd"'))
+        self.assertFalse(app.etag_matches('W/"abc"', ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
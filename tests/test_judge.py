@@ -0,0 +1,225 @@
+"""Tests for the LLM judge."""
+
+import json
+import unittest
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock, AsyncMock
+
+from src.llm.judge import (
+    EventJudge,
+    CryptoEvent,
+    CryptoEvents,
+    JUDGE_MAX_TOKENS,
+    JUDGE_SYSTEM_PROMPT,
+)
+from src.models import SearchResult
+
+
+def make_event(url, score):
+    """Create a CryptoEvent with the given URL and score."""
+    return CryptoEvent(
+        reasoning="Reasoning",
+        title=f"Event {url}",
+        description="Description",
+        date="2021-03-13",
+        published_date=None,
+        score=score,
+        url=url,
+    )
+
+
+def make_client(parsed_responses):
+    """Create a mock AsyncOpenAI client returning the given parsed responses.
+
+    Exceptions in the list are raised by the corresponding call instead.
+    """
+    responses = []
+    for parsed in parsed_responses:
+        if isinstance(parsed, Exception):
+            responses.append(parsed)
+            continue
+        mock_message = MagicMock()
+        mock_message.parsed = parsed
+        mock_choice = MagicMock()
+        mock_choice.message = mock_message
+        mock_response = MagicMock()
+        mock_response.choices = [mock_choice]
+        responses.append(mock_response)
+
+    mock_client = MagicMock()
+    mock_client.beta.chat.completions.parse = AsyncMock(side_effect=responses)
+    return mock_client
+
+
+class TestEventJudgeConcurrent(unittest.TestCase):
+    """Test the chunked, concurrent judge evaluation."""
+
+    def setUp(self):
+        self.search_result = SearchResult(
+            query="Bitcoin news",
+            provider="exa",
+            params={},
+            results=[{"title": f"Result {i}", "url": f"url{i}"} for i in range(7)],
+        )
+
+    def test_single_chunk_uses_one_call(self):
+        """Test that results fitting one chunk are judged in a single call."""
+        mock_client = make_client(
+            [CryptoEvents(reasoning="One", events=[make_event("url0", 4)])]
+        )
+        judge = EventJudge(client=mock_client, model_name="test-model")
+
+        result = asyncio.run(
+            judge.evaluate_relevance_concurrently(
+                self.search_result, "query", datetime(2021, 3, 13), chunk_size=10
+            )
+        )
+
+        mock_client.beta.chat.completions.parse.assert_called_once()
+        self.assertEqual([e.url for e in result.events], ["url0"])
+
+        # Test that the output is deterministic and capped
+        call_kwargs = mock_client.beta.chat.completions.parse.call_args.kwargs
+        self.assertEqual(call_kwargs["temperature"], 0)
+        self.assertEqual(call_kwargs["max_tokens"], JUDGE_MAX_TOKENS)
+
+    def test_chunks_are_merged(self):
+        """Test that chunk outputs are deduplicated by URL and sorted by score."""
+        mock_client = make_client(
+            [
+                CryptoEvents(
+                    reasoning="First",
+                    events=[make_event("url0", 3), make_event("url1", 2)],
+                ),
+                CryptoEvents(reasoning="Second", events=[make_event("url0", 5)]),
+                CryptoEvents(reasoning="Third", events=[make_event("url6", 4)]),
+            ]
+        )
+        judge = EventJudge(client=mock_client, model_name="test-model")
+
+        result = asyncio.run(
+            judge.evaluate_relevance_concurrently(
+                self.search_result,
+                "query",
+                datetime(2021, 3, 13),
+                chunk_size=3,
+                max_events=2,
+            )
+        )
+
+        self.assertEqual(mock_client.beta.chat.completions.parse.call_count, 3)
+        self.assertEqual([e.url for e in result.events], ["url0", "url6"])
+        self.assertEqual(result.events[0].score, 5)
+        self.assertEqual(result.reasoning, "First\n\nSecond\n\nThird")
+
+    def test_chunk_error_is_raised(self):
+        """Test that a failed chunk is raised when errors are requested."""
+        mock_client = make_client(
+            [
+                CryptoEvents(reasoning="First", events=[make_event("url0", 3)]),
+                RuntimeError("judge failed"),
+                CryptoEvents(reasoning="Third", events=[]),
+            ]
+        )
+        judge = EventJudge(client=mock_client, model_name="test-model")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(
+                judge.evaluate_relevance_concurrently(
+                    self.search_result,
+                    "query",
+                    datetime(2021, 3, 13),
+                    chunk_size=3,
+                    raise_errors=True,
+                )
+            )
+
+
+class TestBuildMessages(unittest.TestCase):
+    """Test the judge chat messages."""
+
+    def test_system_prompt_date_placeholder(self):
+        """Test that the date placeholder is filled in custom system prompts only."""
+        judge = EventJudge(client=MagicMock(), model_name="test-model")
+        search_result = SearchResult(
+            query="Bitcoin news", provider="exa", params={}, results=[]
+        )
+        query_date = datetime(2021, 3, 13)
+
+        messages = judge._build_messages(search_result, "query", query_date)
+        self.assertEqual(messages[0]["content"], JUDGE_SYSTEM_PROMPT)
+        self.assertTrue(messages[1]["content"].endswith("March 13, 2021\n"))
+
+        messages = judge._build_messages(
+            search_result,
+            "query",
+            query_date,
+            system_prompt="On {{formatted_date}}: {{formatted_date}}",
+        )
+        self.assertEqual(messages[0]["content"], "On March 13, 2021: March 13, 2021")
+
+
+class TestEventJudgeBatch(unittest.TestCase):
+    """Test the Batch API judge evaluation."""
+
+    def test_batch_output_and_errors(self):
+        """Test that outputs, malformed lines and failed requests are mapped back."""
+        output = CryptoEvents(reasoning="Batch", events=[make_event("url0", 5)])
+        output_lines = [
+            json.dumps(
+                {
+                    "custom_id": "0",
+                    "response": {
+                        "body": {
+                            "choices": [
+                                {"message": {"content": output.model_dump_json()}}
+                            ]
+                        }
+                    },
+                }
+            ),
+            "not json",
+            json.dumps({"custom_id": "1", "response": {"body": {"choices": []}}}),
+        ]
+        error_lines = [
+            json.dumps({"custom_id": "2", "error": {"message": "Rate limited"}})
+        ]
+
+        mock_client = MagicMock()
+        mock_client.files.create = AsyncMock(return_value=MagicMock(id="file"))
+        mock_client.batches.create = AsyncMock(
+            return_value=MagicMock(
+                id="batch",
+                status="completed",
+                output_file_id="output",
+                error_file_id="errors",
+            )
+        )
+        mock_client.files.content = AsyncMock(
+            side_effect=[
+                MagicMock(content="\n".join(output_lines).encode()),
+                MagicMock(content="\n".join(error_lines).encode()),
+            ]
+        )
+        judge = EventJudge(client=mock_client, model_name="test-model")
+        search_result = SearchResult(
+            query="Bitcoin news", provider="exa", params={}, results=[]
+        )
+        requests = [(search_result, "query", datetime(2021, 3, 13))] * 3
+
+        results = asyncio.run(judge.evaluate_relevance_batch(requests))
+
+        self.assertEqual([e.url for e in results[0].events], ["url0"])
+        self.assertEqual(results[1].events, [])
+        self.assertTrue(results[1].reasoning.startswith("Error during evaluation"))
+        self.assertIn("Rate limited", results[2].reasoning)
+
+        # Test that the requests carry the strict structured output format
+        upload = mock_client.files.create.call_args.kwargs["file"][1]
+        body = json.loads(upload.splitlines()[0])["body"]
+        self.assertTrue(body["response_format"]["json_schema"]["strict"])
+
+
+if __name__ == "__main__":
+    unittest.main()